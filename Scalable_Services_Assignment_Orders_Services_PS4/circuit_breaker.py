@@ -0,0 +1,58 @@
+import time
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a dependency whose circuit is open."""
+
+    def __init__(self, name):
+        super().__init__(f"{name} circuit is open")
+        self.name = name
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker for a single downstream service.
+
+    After `threshold` consecutive failures the circuit opens and every call fails
+    fast with CircuitOpenError for `ttl` seconds. The first call after that is let
+    through as a probe (half-open): success closes the circuit, failure reopens it.
+
+    Usage:
+        async with inventory_breaker:
+            response = await client.post(...)
+    """
+
+    def __init__(self, name, threshold=5, ttl=10.0, failure_exceptions=(Exception,)):
+        self.name = name
+        self.threshold = threshold
+        self.ttl = ttl
+        self.failure_exceptions = failure_exceptions
+        self.failures = 0
+        self.opened_at = None
+        self.probing = False
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.ttl:
+            return "half-open"
+        return "open"
+
+    async def __aenter__(self):
+        state = self.state
+        if state == "open" or (state == "half-open" and self.probing):
+            raise CircuitOpenError(self.name)
+        if state == "half-open":
+            self.probing = True
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self.probing = False
+        if exc_type is None:
+            self.failures = 0
+            self.opened_at = None
+        elif issubclass(exc_type, self.failure_exceptions):
+            self.failures += 1
+            if self.opened_at is not None or self.failures >= self.threshold:
+                self.opened_at = time.monotonic()
+        return False
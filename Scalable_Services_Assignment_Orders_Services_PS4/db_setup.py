@@ -19,18 +19,25 @@ def create_database_and_tables():
     cur = conn.cursor()
     cur.execute("""
         CREATE TABLE IF NOT EXISTS Orders (
-            order_id INT PRIMARY KEY,
+            order_id BIGINT AUTO_INCREMENT PRIMARY KEY,
             customer_id INT,
             order_status VARCHAR(50),
             payment_status VARCHAR(50),
             order_total DECIMAL(10,2),
-            created_at DATETIME
+            subtotal DECIMAL(10,2),
+            tax_amount DECIMAL(10,2),
+            shipping_amount DECIMAL(10,2),
+            totals_signature VARCHAR(64),
+            idempotency_key VARCHAR(255),
+            created_at DATETIME,
+            UNIQUE KEY uq_orders_idempotency_key (idempotency_key),
+            INDEX idx_orders_created (created_at, order_id)
         )
     """)
     cur.execute("""
     CREATE TABLE IF NOT EXISTS Order_Items (
         order_item_id INT AUTO_INCREMENT PRIMARY KEY,
-        order_id INT,
+        order_id BIGINT,
         product_id INT,
         sku VARCHAR(100),
         quantity INT,
@@ -62,8 +69,9 @@ def load_csvs():
         cur = conn.cursor()
         cols = ", ".join(df.columns)
         placeholders = ", ".join(["%s"] * len(df.columns))
-        for _, row in df.iterrows():
-            cur.execute(f"INSERT INTO {table_name} ({cols}) VALUES ({placeholders})", tuple(row))
+        # executemany batches the rows into multi-row INSERTs instead of one round-trip per row
+        cur.executemany(f"INSERT INTO {table_name} ({cols}) VALUES ({placeholders})",
+                        list(df.itertuples(index=False, name=None)))
         conn.commit()
         conn.close()
         print(f"✅ Inserted {len(df)} rows into order_db.{table_name}")
@@ -1,16 +1,80 @@
-from fastapi import FastAPI, HTTPException, Header, Depends
-from db_utils import get_connection
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Header, Depends, BackgroundTasks, Query, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import ORJSONResponse
+from db_pool import create_pool, close_pool
+from circuit_breaker import CircuitBreaker
+from metrics import IDEMPOTENCY_REPLAYS, RESERVATION_RELEASE_FAILURES, sample_pools
+from prometheus_fastapi_instrumentator import Instrumentator
 from pydantic import BaseModel
-from datetime import datetime
+from datetime import datetime, timedelta
+from decimal import Decimal
 from typing import Optional, List
 import uvicorn
-import requests
+import asyncio
+import aiomysql
+import httpx
+import msgspec
+import redis.asyncio as redis
 import hashlib
 import json
+import logging
+import os
+import struct
 import time
 import uuid
 
-app = FastAPI(title="ECI Orders API", version="1.0")
+logger = logging.getLogger("orders")
+
+# ----------- HTTP CLIENT, DB POOL & CACHE ------------
+
+# One client per downstream, created once per process so connections are pooled and
+# kept alive. Separate pools act as bulkheads: a slow inventory service can exhaust its
+# own connections but not those used for notifications or shipments.
+inventory_client: Optional[httpx.AsyncClient] = None
+notification_client: Optional[httpx.AsyncClient] = None
+shipment_client: Optional[httpx.AsyncClient] = None
+cache: Optional[redis.Redis] = None
+
+def make_client(base_url: str, max_connections: int) -> httpx.AsyncClient:
+    # Connection budget is per container; each worker takes its share
+    per_worker = max(1, max_connections // WORKERS)
+    return httpx.AsyncClient(
+        base_url=base_url,
+        limits=httpx.Limits(max_connections=per_worker, max_keepalive_connections=per_worker,
+                            keepalive_expiry=30),
+        timeout=httpx.Timeout(connect=2.0, read=5.0, write=5.0, pool=10.0)
+    )
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    global inventory_client, notification_client, shipment_client, cache
+    # Inventory is on the order's critical path; notifications and shipments run in the background
+    inventory_client = make_client(INVENTORY_SERVICE_URL, 80)
+    notification_client = make_client(NOTIFICATION_SERVICE_URL, 20)
+    shipment_client = make_client(SHIPMENT_SERVICE_URL, 20)
+    if REDIS_URL:
+        cache = redis.from_url(REDIS_URL, socket_connect_timeout=0.5, socket_timeout=0.5)
+    app.state.order_pool = await create_pool("order_db")
+    sampler = asyncio.create_task(sample_pools(
+        app.state.order_pool,
+        {"inventory": inventory_client, "notification": notification_client, "shipment": shipment_client},
+        [inventory_breaker, notification_breaker, shipment_breaker]
+    ))
+    try:
+        yield
+    finally:
+        sampler.cancel()
+        await asyncio.gather(inventory_client.aclose(), notification_client.aclose(), shipment_client.aclose())
+        if cache is not None:
+            await cache.aclose()
+        await close_pool(app.state.order_pool)
+
+app = FastAPI(title="ECI Orders API", version="1.0", lifespan=lifespan,
+              default_response_class=ORJSONResponse)
+
+# Per-route request counts and latency histograms, scraped from /metrics
+Instrumentator().instrument(app).expose(app)
 
 # ----------- MODELS ------------
 
@@ -33,15 +97,241 @@ class OrderResponse(BaseModel):
     created_at: datetime
     items: List[dict]
 
+# List rows are built positionally from tuple cursors and encoded by msgspec, skipping
+# per-row dicts and Pydantic validation. Field order must match ORDER_LIST_SQL.
+class OrderRow(msgspec.Struct):
+    order_id: int
+    customer_id: Optional[int]
+    order_status: Optional[str]
+    payment_status: Optional[str]
+    order_total: Optional[Decimal]
+    created_at: Optional[datetime]
+
 # ----------- CONFIGURATION ------------
 INVENTORY_SERVICE_URL = "http://inventoryservice:3000/v1"
 PAYMENT_SERVICE_URL = "http://payment_service:8002/v1"
 NOTIFICATION_SERVICE_URL = "http://notification_service:8080/v1"
 SHIPMENT_SERVICE_URL = "http://shipment_service:8001/v1"
 
+# Paths relative to each downstream client's base_url
+RESERVE_PATH = "/inventory/reserve"
+RELEASE_PATH = "/inventory/release"
+NOTIFICATIONS_PATH = "/notifications"
+SHIPMENTS_PATH = "/shipments"
+
+WORKERS = max(1, int(os.getenv("WEB_CONCURRENCY", 1)))
+
+# Caching is opt-in: without REDIS_URL (e.g. redis://redis:6379/0) every lookup goes to MySQL
+REDIS_URL = os.getenv("REDIS_URL")
+ORDER_CACHE_TTL = 300  # seconds; bounds staleness for updates made outside this service
+IDEMPOTENCY_CACHE_TTL = 86400
+
+json_encoder = msgspec.json.Encoder(decimal_format="number")
+
+# A PENDING claim older than this is treated as abandoned (e.g. the worker died mid-order)
+# and can be taken over by a retry with the same idempotency key
+ORDER_CLAIM_LEASE = timedelta(seconds=60)
+
 TAX_RATE = 0.05  # 5% tax
 SHIPPING_COST = 10.00
 
+# Key for the keyed BLAKE2b totals signature (at most 64 bytes); empty means unkeyed
+TOTALS_SIGNING_KEY = os.getenv("TOTALS_SIGNING_KEY", "").encode()
+
+# ----------- CACHE HELPERS ------------
+# Redis is an optimisation only: with no cache configured, or on any cache error,
+# lookups fall through to MySQL.
+
+async def cache_get(key: str) -> Optional[dict]:
+    if cache is None:
+        return None
+    try:
+        cached = await cache.get(key)
+    except redis.RedisError:
+        return None
+    return json.loads(cached) if cached else None
+
+async def cache_set(key: str, value: dict, ttl: int):
+    if cache is None:
+        return
+    try:
+        await cache.setex(key, ttl, json.dumps(jsonable_encoder(value)))
+    except redis.RedisError:
+        pass
+
+async def cache_delete(*keys: str):
+    if cache is None:
+        return
+    try:
+        await cache.delete(*keys)
+    except redis.RedisError:
+        pass
+
+# ----------- ORDER QUERIES ------------
+
+ORDER_ITEM_FIELDS = ("order_item_id", "product_id", "sku", "quantity", "unit_price")
+
+# Orders joined with their items so an order and its lines load in one round-trip
+ORDER_WITH_ITEMS_SQL = """
+    SELECT o.*, oi.order_item_id, oi.product_id, oi.sku, oi.quantity, oi.unit_price
+    FROM Orders o
+    LEFT JOIN Order_Items oi ON oi.order_id = o.order_id
+    WHERE o.{column} = %s
+    ORDER BY oi.order_item_id
+"""
+ORDER_BY_ID_SQL = ORDER_WITH_ITEMS_SQL.format(column="order_id")
+ORDER_BY_IDEMPOTENCY_KEY_SQL = ORDER_WITH_ITEMS_SQL.format(column="idempotency_key")
+
+# Orders still being placed have no totals yet; a failed attempt deletes its row instead
+IN_FLIGHT_STATUS = "PENDING"
+
+# Only the columns the list view needs; served from idx_orders_created in (created_at, order_id) order.
+# In-flight orders are left out of listings
+ORDER_LIST_SQL = """
+    SELECT order_id, customer_id, order_status, payment_status, order_total, created_at
+    FROM Orders
+    WHERE order_status <> %s
+"""
+
+async def fetch_order_with_items(cur, sql: str, value) -> Optional[dict]:
+    """Run one of the joined order queries and fold the rows into an order with an items list"""
+    await cur.execute(sql, (value,))
+    rows = await cur.fetchall()
+    if not rows:
+        return None
+    
+    order = {column: row_value for column, row_value in rows[0].items() if column not in ORDER_ITEM_FIELDS}
+    order["items"] = [
+        {
+            "order_item_id": row["order_item_id"],
+            "order_id": order["order_id"],
+            "product_id": row["product_id"],
+            "sku": row["sku"],
+            "quantity": row["quantity"],
+            "unit_price": row["unit_price"]
+        }
+        for row in rows if row["order_item_id"] is not None
+    ]
+    return order
+
+async def claim_idempotency_key(cur, customer_id: int, idempotency_key: str,
+                                created_at: datetime) -> tuple:
+    """Claim the key by inserting a PENDING order (committed immediately, pool is autocommit).
+    Returns (order_id, None) when claimed, or (None, existing_order) when another request holds it.
+    An abandoned claim (still PENDING past ORDER_CLAIM_LEASE) is deleted and claimed afresh."""
+    for _ in range(2):
+        # Affected rows is 1 for a new row and 0 when the key already exists
+        await cur.execute("""
+            INSERT INTO Orders (customer_id, order_status, payment_status, idempotency_key, created_at)
+            VALUES (%s, %s, %s, %s, %s)
+            ON DUPLICATE KEY UPDATE order_id = LAST_INSERT_ID(order_id)
+        """, (customer_id, "PENDING", "UNPAID", idempotency_key, created_at))
+        if cur.rowcount == 1:
+            # Order ID comes from AUTO_INCREMENT
+            return cur.lastrowid, None
+        
+        existing_order = await fetch_order_with_items(cur, ORDER_BY_IDEMPOTENCY_KEY_SQL, idempotency_key)
+        if existing_order is None:
+            continue  # Released between the insert and the read
+        # Only one concurrent retry gets to delete a given abandoned row; the others then race
+        # on the insert like any duplicate
+        await cur.execute("""
+            DELETE FROM Orders
+            WHERE order_id = %s AND order_status = %s AND created_at < %s
+        """, (existing_order["order_id"], "PENDING", created_at - ORDER_CLAIM_LEASE))
+        if cur.rowcount != 1:
+            return None, existing_order
+    return None, existing_order
+
+async def release_order_claim(cur, order_id: int):
+    """Delete a claimed order after a failure so the key can be retried. Best effort so the
+    original error surfaces; if it fails, the claim is taken over once its lease expires."""
+    try:
+        await cur.execute("DELETE FROM Orders WHERE order_id = %s AND order_status = %s", (order_id, "PENDING"))
+    except Exception:
+        pass
+
+# ----------- DOWNSTREAM CALLS ------------
+
+class DownstreamServerError(Exception):
+    """A dependency answered with a 5xx; counted by its breaker like a connection error"""
+    def __init__(self, response: httpx.Response):
+        super().__init__(f"{response.request.url.path} returned {response.status_code}")
+        self.response = response
+
+# One breaker per dependency: after 5 consecutive connection errors, timeouts or 5xx
+# responses, calls fail fast for 10s instead of each request waiting out the full timeout.
+BREAKER_FAILURES = (httpx.RequestError, DownstreamServerError)
+inventory_breaker = CircuitBreaker("inventory", threshold=5, ttl=10, failure_exceptions=BREAKER_FAILURES)
+notification_breaker = CircuitBreaker("notification", threshold=5, ttl=10, failure_exceptions=BREAKER_FAILURES)
+shipment_breaker = CircuitBreaker("shipment", threshold=5, ttl=10, failure_exceptions=BREAKER_FAILURES)
+
+async def post_with_breaker(breaker: CircuitBreaker, http: httpx.AsyncClient, path: str,
+                            payload: dict) -> httpx.Response:
+    """POST through a dependency's breaker; raises CircuitOpenError without a network call when
+    open, and DownstreamServerError for a 5xx response"""
+    async with breaker:
+        response = await http.post(path, json=payload)
+        if response.status_code >= 500:
+            raise DownstreamServerError(response)
+        return response
+
+async def release_reservations(reservations: List[dict]) -> List[dict]:
+    """Release inventory reservations concurrently; returns the ones that could not be released.
+    
+    Releases bypass inventory_breaker: it is most likely open exactly when a partial
+    reservation has to be rolled back, and failing fast here would leak the stock.
+    """
+    responses = await asyncio.gather(
+        *(inventory_client.post(RELEASE_PATH, json=reservation) for reservation in reservations),
+        return_exceptions=True
+    )
+    failed = []
+    for reservation, response in zip(reservations, responses):
+        # 404 means the reservation is already released (or expired), which is the goal
+        if isinstance(response, Exception) or response.status_code not in (200, 404):
+            failed.append(reservation)
+            RESERVATION_RELEASE_FAILURES.inc()
+            logger.error("Failed to release reservation %s for order %s: %s",
+                         reservation["idempotency_key"], reservation["order_id"],
+                         response if isinstance(response, Exception) else response.status_code)
+    return failed
+
+async def send_order_notification(order_id: int, customer_id: int):
+    """Runs after the response is sent; a failed notification never fails the order"""
+    try:
+        notification_data = {
+            "type": "ORDER_CONFIRMED",
+            "customer_id": customer_id,
+            "order_id": order_id,
+            "message": f"Your order #{order_id} has been confirmed and payment processed successfully."
+        }
+        await post_with_breaker(
+            notification_breaker,
+            notification_client,
+            NOTIFICATIONS_PATH,
+            notification_data
+        )
+    except Exception:
+        pass  # Don't fail order if notification fails
+
+async def create_shipment(order_id: int, customer_id: int, order_items: List[dict]):
+    """Runs after the response is sent; a failed shipment request never fails the order"""
+    try:
+        shipment_data = {
+            "order_id": order_id,
+            "customer_id": customer_id,
+            "items": order_items
+        }
+        await post_with_breaker(
+            shipment_breaker,
+            shipment_client,
+            SHIPMENTS_PATH,
+            shipment_data
+        )
+    except Exception:
+        pass  # Don't fail order if shipment creation fails
+
 # ----------- HEALTH CHECK ------------
 
 @app.get("/health")
@@ -51,40 +341,61 @@ def health_check():
 # ----------- ORDER ENDPOINTS WITH /V1 VERSIONING ------------
 
 @app.get("/v1/orders")
-def get_orders(limit: int = 10):
-    conn = get_connection("order_db")
-    cur = conn.cursor(dictionary=True)
+async def get_orders(limit: int = Query(default=10, gt=0, le=100), before: Optional[datetime] = None,
+                     before_id: Optional[int] = None):
+    """List orders newest first; pass next_cursor values back as before/before_id for the next page"""
+    conn = await app.state.order_pool.acquire()
+    cur = await conn.cursor()
     try:
-        cur.execute("SELECT * FROM Orders ORDER BY created_at DESC LIMIT %s", (limit,))
-        orders = cur.fetchall()
-        return {"orders": orders, "count": len(orders)}
+        # Keyset on (created_at, order_id) so pages stay cheap however deep they go
+        if before is None:
+            where, params = "", ()
+        elif before_id is None:
+            where, params = "AND created_at < %s", (before,)
+        else:
+            where, params = "AND (created_at, order_id) < (%s, %s)", (before, before_id)
+        await cur.execute(f"{ORDER_LIST_SQL} {where} ORDER BY created_at DESC, order_id DESC LIMIT %s",
+                          (IN_FLIGHT_STATUS, *params, limit))
+        orders = [OrderRow(*row) for row in await cur.fetchall()]
+        next_cursor = None
+        if len(orders) == limit:
+            last_order = orders[-1]
+            next_cursor = {"before": last_order.created_at, "before_id": last_order.order_id}
+        body = json_encoder.encode({"orders": orders, "count": len(orders), "next_cursor": next_cursor})
+        return Response(content=body, media_type="application/json")
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
     finally:
-        cur.close()
-        conn.close()
+        await cur.close()
+        app.state.order_pool.release(conn)
 
 @app.get("/v1/orders/{order_id}")
-def get_order_by_id(order_id: int):
-    conn = get_connection("order_db")
-    cur = conn.cursor(dictionary=True)
+async def get_order_by_id(order_id: int):
+    cached_order = await cache_get(f"order:{order_id}")
+    if cached_order:
+        return cached_order
+    
+    conn = await app.state.order_pool.acquire()
+    cur = await conn.cursor(aiomysql.DictCursor)
     try:
-        cur.execute("SELECT * FROM Orders WHERE order_id = %s", (order_id,))
-        order = cur.fetchone()
+        order = await fetch_order_with_items(cur, ORDER_BY_ID_SQL, order_id)
         if not order:
             raise HTTPException(status_code=404, detail="Order not found")
-        
-        cur.execute("SELECT * FROM Order_Items WHERE order_id = %s", (order_id,))
-        order["items"] = cur.fetchall()
+        # An in-flight order is about to change (or disappear), so it's never cached
+        if order["order_status"] != IN_FLIGHT_STATUS:
+            await cache_set(f"order:{order_id}", order, ORDER_CACHE_TTL)
         return order
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
     finally:
-        cur.close()
-        conn.close()
+        await cur.close()
+        app.state.order_pool.release(conn)
 
 @app.post("/v1/orders")
-def place_order(order_request: PlaceOrderRequest, idempotency_key: str = Header(None, alias="Idempotency-Key")):
+async def place_order(order_request: PlaceOrderRequest, background_tasks: BackgroundTasks,
+                      idempotency_key: str = Header(None, alias="Idempotency-Key")):
     """
     Place Order Workflow: Reserve → Pay → Ship
     1. Validate idempotency key
@@ -92,7 +403,12 @@ def place_order(order_request: PlaceOrderRequest, idempotency_key: str = Header(
     3. Calculate totals with tax and shipping
     4. Process payment
     5. Confirm order or rollback on failure
-    6. Send notifications
+    6. Send notification and request shipment after the response is returned
+    
+    The idempotency key is claimed up front by inserting a PENDING order; the UNIQUE
+    index on idempotency_key serialises concurrent duplicates, so only one request
+    ever reserves inventory and charges for a key. The row then moves to
+    CONFIRMED, or is deleted on failure so the client can retry with the same key.
     """
     
     # Use provided idempotency key or generate one
@@ -102,92 +418,93 @@ def place_order(order_request: PlaceOrderRequest, idempotency_key: str = Header(
         else:
             idempotency_key = str(uuid.uuid4())
     
-    conn = get_connection("order_db")
-    cur = conn.cursor(dictionary=True)
+    # Replays of a completed order are answered from Redis without touching MySQL
+    cached_order = await cache_get(f"idem:{idempotency_key}")
+    if cached_order:
+        IDEMPOTENCY_REPLAYS.labels(source="cache").inc()
+        return {"message": "Order already exists", "order": cached_order, "idempotent": True}
+    
+    conn = await app.state.order_pool.acquire()
+    cur = await conn.cursor(aiomysql.DictCursor)
+    reservations = []
+    order_claimed = False
     
     try:
-        # Check for existing order with same idempotency key
-        cur.execute("SELECT * FROM Orders WHERE idempotency_key = %s", (idempotency_key,))
-        existing_order = cur.fetchone()
-        if existing_order:
-            cur.execute("SELECT * FROM Order_Items WHERE order_id = %s", (existing_order['order_id'],))
-            existing_order["items"] = cur.fetchall()
-            return {"message": "Order already exists", "order": existing_order, "idempotent": True}
+        created_at = datetime.now()
         
-        # Generate order ID
-        order_id = int(time.time() * 1000) % 2147483647  # Max MySQL INT
+        # Claim the idempotency key atomically
+        order_id, existing_order = await claim_idempotency_key(
+            cur, order_request.customer_id, idempotency_key, created_at)
         
-        # Step 1: Reserve inventory for all items
-        reservations = []
+        if order_id is None:
+            if existing_order is None or existing_order["order_status"] == IN_FLIGHT_STATUS:
+                raise HTTPException(status_code=409, detail="An order with this idempotency key is still being processed")
+            IDEMPOTENCY_REPLAYS.labels(source="db").inc()
+            return {"message": "Order already exists", "order": existing_order, "idempotent": True}
+        order_claimed = True
+        
+        # Step 1: Reserve inventory for all items concurrently
         total_amount = 0.0
         order_items = []
         
-        for item in order_request.items:
+        # Per-order invariants are computed once rather than per item. Reservation keys
+        # include the order id so a retry after a failed attempt reserves afresh instead of
+        # getting back the attempt's released reservations
+        order_id_str = str(order_id)
+        key_prefix = f"{idempotency_key}_{order_id_str}_"
+        reservation_requests = [
+            {
+                "product_id": item.product_id,
+                "quantity": item.quantity,
+                "idempotency_key": key_prefix + str(item.product_id),
+                "order_id": order_id_str
+            }
+            for item in order_request.items
+        ]
+        responses = await asyncio.gather(
+            *(post_with_breaker(inventory_breaker, inventory_client, RESERVE_PATH, reservation_data)
+              for reservation_data in reservation_requests),
+            return_exceptions=True
+        )
+        
+        failure = None
+        for item, reservation_data, response in zip(order_request.items, reservation_requests, responses):
+            if isinstance(response, Exception):
+                failure = failure or HTTPException(
+                    status_code=503,
+                    detail=f"Inventory service unavailable: {str(response)}"
+                )
+                continue
+            
+            if response.status_code != 200:
+                failure = failure or HTTPException(
+                    status_code=409,
+                    detail=f"Failed to reserve inventory for product {item.product_id}: {response.text}"
+                )
+                continue
+            
             # Get current price from catalog (would be implemented)
             # For now, using a mock price
             unit_price = 29.99  # Mock price
             
-            # Reserve inventory
-            reservation_data = {
+            reservations.append({
+                "idempotency_key": reservation_data["idempotency_key"],
+                "order_id": str(order_id)
+            })
+            
+            order_items.append({
                 "product_id": item.product_id,
+                "sku": item.sku,
                 "quantity": item.quantity,
-                "idempotency_key": f"{idempotency_key}_{item.product_id}",
-                "order_id": str(order_id)
-            }
+                "unit_price": unit_price
+            })
             
-            try:
-                response = requests.post(
-                    f"{INVENTORY_SERVICE_URL}/inventory/reserve",
-                    json=reservation_data,
-                    timeout=10
-                )
-                
-                if response.status_code == 200:
-                    reservation_result = response.json()
-                    reservations.append({
-                        "idempotency_key": reservation_data["idempotency_key"],
-                        "order_id": str(order_id)
-                    })
-                    
-                    order_items.append({
-                        "product_id": item.product_id,
-                        "sku": item.sku,
-                        "quantity": item.quantity,
-                        "unit_price": unit_price
-                    })
-                    
-                    total_amount += unit_price * item.quantity
-                    
-                else:
-                    # Rollback previous reservations
-                    for prev_reservation in reservations:
-                        try:
-                            requests.post(
-                                f"{INVENTORY_SERVICE_URL}/inventory/release",
-                                json=prev_reservation,
-                                timeout=5
-                            )
-                        except:
-                            pass
-                    
-                    raise HTTPException(
-                        status_code=409,
-                        detail=f"Failed to reserve inventory for product {item.product_id}: {response.text}"
-                    )
-                    
-            except requests.RequestException as e:
-                # Rollback previous reservations
-                for prev_reservation in reservations:
-                    try:
-                        requests.post(
-                            f"{INVENTORY_SERVICE_URL}/inventory/release",
-                            json=prev_reservation,
-                            timeout=5
-                        )
-                    except:
-                        pass
-                
-                raise HTTPException(status_code=503, detail=f"Inventory service unavailable: {str(e)}")
+            total_amount += unit_price * item.quantity
+        
+        if failure:
+            # Rollback the reservations that did succeed
+            await release_reservations(reservations)
+            raise failure
         
         # Step 2: Calculate totals
         subtotal = total_amount
@@ -195,14 +512,9 @@ def place_order(order_request: PlaceOrderRequest, idempotency_key: str = Header(
         shipping_amount = SHIPPING_COST
         total_with_tax_shipping = subtotal + tax_amount + shipping_amount
         
-        # Create totals signature (hash for tamper detection)
-        totals_data = {
-            "subtotal": subtotal,
-            "tax": tax_amount,
-            "shipping": shipping_amount,
-            "total": total_with_tax_shipping
-        }
-        totals_signature = hashlib.sha256(json.dumps(totals_data, sort_keys=True).encode()).hexdigest()
+        # Create totals signature (keyed hash for tamper detection) over the packed amounts
+        totals_payload = struct.pack("<dddd", subtotal, tax_amount, shipping_amount, total_with_tax_shipping)
+        totals_signature = hashlib.blake2b(totals_payload, digest_size=16, key=TOTALS_SIGNING_KEY).hexdigest()
         
         # Step 3: Process Payment
         payment_data = {
@@ -222,133 +534,105 @@ def place_order(order_request: PlaceOrderRequest, idempotency_key: str = Header(
             
         except Exception as e:
             # Payment failed - release all reservations
-            for reservation in reservations:
-                try:
-                    requests.post(
-                        f"{INVENTORY_SERVICE_URL}/inventory/release",
-                        json=reservation,
-                        timeout=5
-                    )
-                except:
-                    pass
+            await release_reservations(reservations)
             
             raise HTTPException(status_code=402, detail=f"Payment processing failed: {str(e)}")
         
         if not payment_success:
             # Payment failed - release all reservations
-            for reservation in reservations:
-                try:
-                    requests.post(
-                        f"{INVENTORY_SERVICE_URL}/inventory/release",
-                        json=reservation,
-                        timeout=5
-                    )
-                except:
-                    pass
+            await release_reservations(reservations)
             
             raise HTTPException(status_code=402, detail="Payment was declined")
         
-        # Step 4: Create order record
-        cur.execute("""
-            INSERT INTO Orders (order_id, customer_id, order_status, payment_status, 
-                              order_total, subtotal, tax_amount, shipping_amount,
-                              totals_signature, idempotency_key, created_at)
-            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-        """, (order_id, order_request.customer_id, "CONFIRMED", "PAID",
-              total_with_tax_shipping, subtotal, tax_amount, shipping_amount,
-              totals_signature, idempotency_key, datetime.now()))
+        # Step 4: Confirm the order record and write its items in one transaction
+        await conn.begin()
+        await cur.execute("""
+            UPDATE Orders
+            SET order_status = %s, payment_status = %s, order_total = %s, subtotal = %s,
+                tax_amount = %s, shipping_amount = %s, totals_signature = %s
+            WHERE order_id = %s AND order_status = %s
+        """, ("CONFIRMED", "PAID", total_with_tax_shipping, subtotal, tax_amount,
+              shipping_amount, totals_signature, order_id, "PENDING"))
+        if cur.rowcount != 1:
+            # This attempt outlived ORDER_CLAIM_LEASE and a retry took the key over
+            order_claimed = False
+            await release_reservations(reservations)
+            raise HTTPException(status_code=409, detail="Order claim expired; it was retried by a newer request")
         
-        # Create order items
-        for item in order_items:
-            cur.execute("""
-                INSERT INTO Order_Items (order_id, product_id, sku, quantity, unit_price)
-                VALUES (%s, %s, %s, %s, %s)
-            """, (order_id, item["product_id"], item["sku"], 
-                  item["quantity"], item["unit_price"]))
+        # Create order items in a single multi-row INSERT
+        await cur.executemany("""
+            INSERT INTO Order_Items (order_id, product_id, sku, quantity, unit_price)
+            VALUES (%s, %s, %s, %s, %s)
+        """, [(order_id, item["product_id"], item["sku"], item["quantity"], item["unit_price"])
+              for item in order_items])
         
-        conn.commit()
+        await conn.commit()
+        # Confirmed: the claim and the reserved stock now belong to the order, so no error
+        # below may release either
+        order_claimed = False
+        reservations = []
+        # Drop anything cached for this id before it was confirmed
+        await cache_delete(f"order:{order_id}")
         
-        # Step 5: Send notifications (async)
-        try:
-            notification_data = {
-                "type": "ORDER_CONFIRMED",
-                "customer_id": order_request.customer_id,
-                "order_id": order_id,
-                "message": f"Your order #{order_id} has been confirmed and payment processed successfully."
-            }
-            requests.post(
-                f"{NOTIFICATION_SERVICE_URL}/notifications",
-                json=notification_data,
-                timeout=5
-            )
-        except:
-            pass  # Don't fail order if notification fails
+        # Step 5 & 6: Send notification and create shipment off the critical path
+        background_tasks.add_task(send_order_notification, order_id, order_request.customer_id)
+        background_tasks.add_task(create_shipment, order_id, order_request.customer_id, order_items)
         
-        # Step 6: Create shipment (optional)
+        # Return the order as stored, so a fresh order and its replays (from Redis or MySQL)
+        # all have the same shape and rounded amounts; payment_id is only known to this request
         try:
-            shipment_data = {
-                "order_id": order_id,
-                "customer_id": order_request.customer_id,
-                "items": order_items
-            }
-            requests.post(
-                f"{SHIPMENT_SERVICE_URL}/shipments",
-                json=shipment_data,
-                timeout=5
-            )
-        except:
-            pass  # Don't fail order if shipment creation fails
-        
-        # Return successful order
-        return {
-            "message": "Order placed successfully",
-            "order": {
+            order = await fetch_order_with_items(cur, ORDER_BY_ID_SQL, order_id)
+        except Exception:
+            order = None
+        if order is None:
+            # The order is committed either way; answer from memory and leave the cache for
+            # a replay, which reads the stored row
+            order = {
                 "order_id": order_id,
                 "customer_id": order_request.customer_id,
                 "order_status": "CONFIRMED",
                 "payment_status": "PAID",
-                "subtotal": subtotal,
-                "tax_amount": tax_amount,
-                "shipping_amount": shipping_amount,
-                "order_total": total_with_tax_shipping,
-                "payment_id": payment_id,
+                "order_total": round(total_with_tax_shipping, 2),
+                "subtotal": round(subtotal, 2),
+                "tax_amount": round(tax_amount, 2),
+                "shipping_amount": round(shipping_amount, 2),
+                "totals_signature": totals_signature,
                 "idempotency_key": idempotency_key,
-                "created_at": datetime.now().isoformat(),
-                "items": order_items
+                "created_at": created_at,
+                "items": [{"order_id": order_id, **item} for item in order_items]
             }
-        }
+        else:
+            await cache_set(f"idem:{idempotency_key}", order, IDEMPOTENCY_CACHE_TTL)
+        return {"message": "Order placed successfully", "order": {**order, "payment_id": payment_id}}
         
     except HTTPException:
+        await conn.rollback()
+        if order_claimed:
+            await release_order_claim(cur, order_id)
         raise
     except Exception as e:
         # Rollback reservations on any error
-        for reservation in reservations:
-            try:
-                requests.post(
-                    f"{INVENTORY_SERVICE_URL}/inventory/release",
-                    json=reservation,
-                    timeout=5
-                )
-            except:
-                pass
+        await release_reservations(reservations)
         
-        conn.rollback()
+        await conn.rollback()
+        if order_claimed:
+            await release_order_claim(cur, order_id)
         raise HTTPException(status_code=500, detail=f"Order processing failed: {str(e)}")
     
     finally:
-        cur.close()
-        conn.close()
+        await cur.close()
+        app.state.order_pool.release(conn)
 
 @app.post("/v1/orders/{order_id}/cancel")
-def cancel_order(order_id: int):
+async def cancel_order(order_id: int):
     """Cancel an order and release reservations"""
-    conn = get_connection("order_db")
-    cur = conn.cursor(dictionary=True)
+    conn = await app.state.order_pool.acquire()
+    cur = await conn.cursor(aiomysql.DictCursor)
     
     try:
         # Get order details
-        cur.execute("SELECT * FROM Orders WHERE order_id = %s", (order_id,))
-        order = cur.fetchone()
+        await cur.execute("SELECT * FROM Orders WHERE order_id = %s", (order_id,))
+        order = await cur.fetchone()
         
         if not order:
             raise HTTPException(status_code=404, detail="Order not found")
@@ -358,40 +642,46 @@ def cancel_order(order_id: int):
         
         # Release inventory reservations
         if order.get("idempotency_key"):
-            cur.execute("SELECT * FROM Order_Items WHERE order_id = %s", (order_id,))
-            items = cur.fetchall()
+            await cur.execute("SELECT * FROM Order_Items WHERE order_id = %s", (order_id,))
+            items = await cur.fetchall()
             
-            for item in items:
-                try:
-                    release_data = {
-                        "idempotency_key": f"{order['idempotency_key']}_{item['product_id']}",
-                        "order_id": str(order_id)
-                    }
-                    requests.post(
-                        f"{INVENTORY_SERVICE_URL}/inventory/release",
-                        json=release_data,
-                        timeout=5
-                    )
-                except:
-                    pass  # Continue with cancellation even if release fails
+            # Keep the order cancellable until every reservation is released; releasing is
+            # idempotent, so the client can simply retry the cancel
+            failed_releases = await release_reservations([
+                {
+                    "idempotency_key": f"{order['idempotency_key']}_{order_id}_{item['product_id']}",
+                    "order_id": str(order_id)
+                }
+                for item in items
+            ])
+            if failed_releases:
+                raise HTTPException(
+                    status_code=503,
+                    detail=f"Could not release {len(failed_releases)} inventory reservation(s); retry the cancel"
+                )
         
         # Update order status
-        cur.execute(
+        await cur.execute(
             "UPDATE Orders SET order_status = %s WHERE order_id = %s",
             ("CANCELLED", order_id)
         )
-        conn.commit()
+        await conn.commit()
+        
+        cache_keys = [f"order:{order_id}"]
+        if order.get("idempotency_key"):
+            cache_keys.append(f"idem:{order['idempotency_key']}")
+        await cache_delete(*cache_keys)
         
         return {"message": "Order cancelled successfully", "order_id": order_id}
         
     except HTTPException:
         raise
     except Exception as e:
-        conn.rollback()
+        await conn.rollback()
         raise HTTPException(status_code=500, detail=str(e))
     finally:
-        cur.close()
-        conn.close()
+        await cur.close()
+        app.state.order_pool.release(conn)
 
 if __name__ == "__main__":
-    uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
+    uvicorn.run("enhanced_order_service:app", host="0.0.0.0", port=8000, loop="uvloop", http="httptools")
\ No newline at end of file
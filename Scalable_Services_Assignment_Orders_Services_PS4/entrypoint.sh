@@ -14,5 +14,9 @@ echo "[entrypoint] running DB setup (if any)"
 # db_setup may create tables / import CSVs; ignore failures so container still starts
 python db_setup.py || echo "db_setup.py finished or returned non-zero; continuing"
 
-echo "[entrypoint] starting uvicorn"
-exec uvicorn main:app --host 0.0.0.0 --port 8000
+# 2 x CPUs + 1 workers unless overridden; db_pool.py splits the DB pool budget across them
+WEB_CONCURRENCY=${WEB_CONCURRENCY:-$((2 * $(nproc) + 1))}
+export WEB_CONCURRENCY
+
+echo "[entrypoint] starting gunicorn with $WEB_CONCURRENCY uvicorn workers"
+exec gunicorn main:app -k uvicorn.workers.UvicornWorker -w "$WEB_CONCURRENCY" --bind 0.0.0.0:8000
@@ -1,11 +1,29 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, HTTPException, Query
 from db_utils import get_connection
 from pydantic import BaseModel
 from datetime import datetime
 from typing import Optional
+import anyio.to_thread
 import uvicorn
+import os
 
-app = FastAPI(title="ECI Orders API", version="1.0")
+# Sync handlers run on anyio's threadpool (40 threads by default), so a burst beyond that
+# queues before reaching MySQL. Stopgap until these handlers are made async like
+# enhanced_order_service.py. THREADPOOL_SIZE is the per-container budget split across
+# gunicorn workers (WEB_CONCURRENCY), as in db_pool.py, but a worker never gets fewer than
+# anyio's default. Each thread can hold a MySQL connection, so keep the larger of the budget
+# and 40 x workers, times replicas, within MySQL's max_connections
+ANYIO_DEFAULT_THREADS = 40
+WORKERS = max(1, int(os.getenv("WEB_CONCURRENCY", 1)))
+THREADPOOL_SIZE = max(ANYIO_DEFAULT_THREADS, int(os.getenv("THREADPOOL_SIZE", 200)) // WORKERS)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    anyio.to_thread.current_default_thread_limiter().total_tokens = THREADPOOL_SIZE
+    yield
+
+app = FastAPI(title="ECI Orders API", version="1.0", lifespan=lifespan)
 
 # ----------- MODELS ------------
 
@@ -248,4 +266,4 @@ def delete_order_item(order_item_id: int):
 
 if __name__ == "__main__":
     # Bind to 0.0.0.0 so the server is reachable from Docker containers / host mappings
-    uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
\ No newline at end of file
+    uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True, loop="uvloop", http="httptools")
\ No newline at end of file
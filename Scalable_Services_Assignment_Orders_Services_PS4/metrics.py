@@ -0,0 +1,36 @@
+import asyncio
+from prometheus_client import Counter, Gauge
+
+# Request latency histograms (p50/p95/p99) come from prometheus-fastapi-instrumentator;
+# these gauges cover the pools and breakers that its per-route metrics can't see.
+DB_POOL_IN_USE = Gauge("order_db_pool_in_use", "MySQL connections currently borrowed from the pool")
+DB_POOL_SIZE = Gauge("order_db_pool_size", "MySQL connections currently open in the pool")
+HTTP_POOL_CONNECTIONS = Gauge("order_http_pool_connections", "Open connections in a downstream client's pool",
+                              ["service"])
+CIRCUIT_BREAKER_STATE = Gauge("circuit_breaker_state", "Breaker state: 0 closed, 1 half-open, 2 open",
+                              ["service"])
+IDEMPOTENCY_REPLAYS = Counter("idempotency_replay_total", "Orders answered from an earlier request with the same key",
+                              ["source"])
+RESERVATION_RELEASE_FAILURES = Counter("reservation_release_failures_total",
+                                       "Inventory reservations a rollback or cancel could not release")
+
+BREAKER_STATE_VALUES = {"closed": 0, "half-open": 1, "open": 2}
+SAMPLE_INTERVAL = 5.0  # seconds
+
+
+def http_pool_connections(client):
+    """Number of open connections in an httpx.AsyncClient's pool (relies on httpcore internals)."""
+    pool = getattr(client._transport, "_pool", None)
+    return len(pool.connections) if pool is not None else 0
+
+
+async def sample_pools(db_pool, http_clients, breakers, interval=SAMPLE_INTERVAL):
+    """Refresh the pool and breaker gauges every `interval` seconds until cancelled."""
+    while True:
+        DB_POOL_IN_USE.set(db_pool.size - db_pool.freesize)
+        DB_POOL_SIZE.set(db_pool.size)
+        for service, client in http_clients.items():
+            HTTP_POOL_CONNECTIONS.labels(service=service).set(http_pool_connections(client))
+        for breaker in breakers:
+            CIRCUIT_BREAKER_STATE.labels(service=breaker.name).set(BREAKER_STATE_VALUES[breaker.state])
+        await asyncio.sleep(interval)
@@ -0,0 +1,46 @@
+import aiomysql
+import os
+from dotenv import load_dotenv
+from pathlib import Path
+
+# Load .env located in the same service folder (safe and explicit)
+env_path = Path(__file__).resolve().parent / ".env"
+load_dotenv(dotenv_path=str(env_path))
+
+# Every gunicorn worker (WEB_CONCURRENCY) owns a pool, so DB_POOL_MAX_SIZE is the
+# per-container budget split across workers; keep it x replicas below MySQL's max_connections
+WORKERS = max(1, int(os.getenv("WEB_CONCURRENCY", 1)))
+POOL_MAX_SIZE = max(1, int(os.getenv("DB_POOL_MAX_SIZE", 50)) // WORKERS)
+POOL_MIN_SIZE = min(int(os.getenv("DB_POOL_MIN_SIZE", 10)), POOL_MAX_SIZE)
+POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", 300))
+
+
+async def create_pool(db_name=None):
+    """Return an aiomysql connection pool, created once at application startup."""
+    # Ensure port is an int when provided
+    port = os.getenv("DB_PORT")
+    try:
+        port = int(port) if port is not None else 3306
+    except ValueError:
+        port = 3306
+
+    pool = await aiomysql.create_pool(
+        host=os.getenv("DB_HOST", "127.0.0.1"),
+        port=port,
+        user=os.getenv("DB_USER", "root"),
+        password=os.getenv("DB_PASSWORD", ""),
+        db=db_name,
+        minsize=POOL_MIN_SIZE,
+        maxsize=POOL_MAX_SIZE,
+        pool_recycle=POOL_RECYCLE,
+        # Reads run outside a transaction; writers call conn.begin() explicitly so
+        # connections are never handed back to the pool mid-transaction
+        autocommit=True
+    )
+    return pool
+
+
+async def close_pool(pool):
+    """Close all pooled connections on application shutdown."""
+    pool.close()
+    await pool.wait_closed()
@@ -1,6 +1,6 @@
 import os
 import pandas as pd
-from db_utils import get_connection
+from db_utils import get_connection, get_engine
 from pathlib import Path
 
 SERVICE_DIR = Path(__file__).resolve().parent
@@ -19,7 +19,7 @@ def create_database_and_table():
     cur.execute("""
         CREATE TABLE IF NOT EXISTS Shipments (
             shipment_id INT PRIMARY KEY,
-            order_id INT,
+            order_id BIGINT,
             carrier VARCHAR(100),
             status VARCHAR(50),
             tracking_no VARCHAR(100),
@@ -44,16 +44,20 @@ def create_database_and_table():
 
 def load_csv():
     file_path = CSV_DIR / "Shipments.csv"
-    df = pd.read_csv(str(file_path))
+    # Typed columns up front so pandas doesn't fall back to object dtype
+    df = pd.read_csv(
+        str(file_path),
+        dtype={"shipment_id": "int64", "order_id": "int64", "carrier": "string",
+               "status": "string", "tracking_no": "string"},
+        parse_dates=["shipped_at", "delivered_at"]
+    )
     print(f"📥 Loading Shipments.csv ({len(df)} rows) into shipping_db.Shipments")
-    conn = get_connection("shipping_db")
-    cur = conn.cursor()
-    cols = ", ".join(df.columns)
-    placeholders = ", ".join(["%s"] * len(df.columns))
-    for _, row in df.iterrows():
-        cur.execute(f"INSERT INTO Shipments ({cols}) VALUES ({placeholders})", tuple(row))
-    conn.commit()
-    conn.close()
+    engine = get_engine("shipping_db")
+    try:
+        # One multi-row INSERT per 1000 rows; missing dates are written as NULL
+        df.to_sql("Shipments", engine, if_exists="append", index=False, method="multi", chunksize=1000)
+    finally:
+        engine.dispose()
     print(f"✅ Inserted {len(df)} rows into shipping_db.Shipments")
 
 
@@ -1,5 +1,7 @@
 import mysql.connector
 import os
+from sqlalchemy import create_engine
+from sqlalchemy.engine import URL
 from dotenv import load_dotenv
 from pathlib import Path
 
@@ -18,3 +20,17 @@ def get_connection(db_name=None):
         database=db_name if db_name else None
     )
     return conn
+
+
+def get_engine(db_name=None):
+    """Return a SQLAlchemy engine (same credentials, mysql-connector driver) for pandas bulk loads."""
+    port = os.getenv("DB_PORT")
+    url = URL.create(
+        "mysql+mysqlconnector",
+        username=os.getenv("DB_USER"),
+        password=os.getenv("DB_PASSWORD"),
+        host=os.getenv("DB_HOST"),
+        port=int(port) if port else None,
+        database=db_name
+    )
+    return create_engine(url)
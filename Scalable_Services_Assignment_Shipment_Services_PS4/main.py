@@ -1,10 +1,44 @@
-from fastapi import FastAPI, HTTPException, Query
-from db_utils import get_connection
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Query, Response
+from fastapi.responses import ORJSONResponse
+from db_pool import create_pool, close_pool
 from pydantic import BaseModel
 from datetime import datetime
+import aiomysql
+import msgspec
 import uvicorn
 
-app = FastAPI(title="ECI Shipments API", version="1.0")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # One pool per process; handlers borrow a connection instead of opening one per request
+    app.state.shipping_pool = await create_pool("shipping_db")
+    try:
+        yield
+    finally:
+        await close_pool(app.state.shipping_pool)
+
+
+app = FastAPI(title="ECI Shipments API", version="1.0", lifespan=lifespan,
+              default_response_class=ORJSONResponse)
+
+SHIPMENT_COLUMNS = "shipment_id, order_id, carrier, status, tracking_no, shipped_at, delivered_at"
+
+
+# List rows are built positionally from tuple cursors and encoded by msgspec;
+# field order must match SHIPMENT_COLUMNS
+class ShipmentRow(msgspec.Struct):
+    shipment_id: int
+    order_id: int | None
+    carrier: str | None
+    status: str | None
+    tracking_no: str | None
+    shipped_at: datetime | None
+    delivered_at: datetime | None
+
+
+json_encoder = msgspec.json.Encoder()
+
 
 class Shipment(BaseModel):
     shipment_id: int
@@ -17,96 +51,109 @@ class Shipment(BaseModel):
 
 
 @app.get("/shipments")
-def get_shipments(limit: int = Query(default=10, gt=0, description="Limit number of shipments to fetch")):
-    conn = get_connection("shipping_db")
-    cur = conn.cursor(dictionary=True)
+async def get_shipments(limit: int = Query(default=10, gt=0, description="Limit number of shipments to fetch"),
+                        before_id: int | None = Query(default=None, description="Return shipments with shipment_id below this (keyset cursor)")):
+    conn = await app.state.shipping_pool.acquire()
+    cur = await conn.cursor()
     try:
-        cur.execute(f"SELECT * FROM Shipments LIMIT {limit}")
-        shipments = cur.fetchall()
-        return shipments
+        # Keyset pagination on the primary key: each page is an index range scan
+        if before_id is None:
+            await cur.execute(
+                f"SELECT {SHIPMENT_COLUMNS} FROM Shipments ORDER BY shipment_id DESC LIMIT %s", (limit,))
+        else:
+            await cur.execute(
+                f"SELECT {SHIPMENT_COLUMNS} FROM Shipments WHERE shipment_id < %s ORDER BY shipment_id DESC LIMIT %s",
+                (before_id, limit))
+        shipments = [ShipmentRow(*row) for row in await cur.fetchall()]
+        return Response(content=json_encoder.encode(shipments), media_type="application/json")
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
     finally:
-        conn.close()
+        await cur.close()
+        app.state.shipping_pool.release(conn)
 
 
 @app.post("/shipments")
-def add_shipment(shipment: Shipment):
-    conn = get_connection("shipping_db")
-    cur = conn.cursor()
+async def add_shipment(shipment: Shipment):
+    conn = await app.state.shipping_pool.acquire()
+    cur = await conn.cursor()
     try:
-        cur.execute("""
+        await cur.execute("""
             INSERT INTO Shipments (shipment_id, order_id, carrier, status, tracking_no, shipped_at, delivered_at)
             VALUES (%s, %s, %s, %s, %s, %s, %s)
         """, (shipment.shipment_id, shipment.order_id, shipment.carrier, shipment.status,
               shipment.tracking_no, shipment.shipped_at, shipment.delivered_at))
-        conn.commit()
+        await conn.commit()
         return {"message": "✅ Shipment inserted successfully"}
     except Exception as e:
-        conn.rollback()
+        await conn.rollback()
         raise HTTPException(status_code=500, detail=str(e))
     finally:
-        cur.close()
-        conn.close()
+        await cur.close()
+        app.state.shipping_pool.release(conn)
 
 
 @app.get("/shipments/{shipment_id}")
-def get_shipment_by_id(shipment_id: int):
-    conn = get_connection("shipping_db")
-    cur = conn.cursor(dictionary=True)
+async def get_shipment_by_id(shipment_id: int):
+    conn = await app.state.shipping_pool.acquire()
+    cur = await conn.cursor(aiomysql.DictCursor)
     try:
-        cur.execute("SELECT * FROM Shipments WHERE shipment_id = %s", (shipment_id,))
-        shipment = cur.fetchone()
+        await cur.execute("SELECT * FROM Shipments WHERE shipment_id = %s", (shipment_id,))
+        shipment = await cur.fetchone()
         if not shipment:
             raise HTTPException(status_code=404, detail="Shipment not found")
         return shipment
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
     finally:
-        conn.close()
+        await cur.close()
+        app.state.shipping_pool.release(conn)
 
 @app.put("/shipments/{shipment_id}")
-def update_shipment(shipment_id: int, updated_shipment: Shipment):
+async def update_shipment(shipment_id: int, updated_shipment: Shipment):
     """Update a shipment."""
-    conn = get_connection("shipping_db")
-    cur = conn.cursor()
+    conn = await app.state.shipping_pool.acquire()
+    cur = await conn.cursor()
     try:
-        cur.execute("""
+        await cur.execute("""
             UPDATE Shipments 
             SET order_id=%s, carrier=%s, status=%s, tracking_no=%s, shipped_at=%s, delivered_at=%s 
             WHERE shipment_id=%s
         """, (updated_shipment.order_id, updated_shipment.carrier, updated_shipment.status,
               updated_shipment.tracking_no, updated_shipment.shipped_at, updated_shipment.delivered_at, shipment_id))
-        conn.commit()
+        await conn.commit()
 
         if cur.rowcount == 0:
             raise HTTPException(status_code=404, detail="Shipment not found")
 
         return {"message": "✅ Shipment updated successfully"}
     except Exception as e:
-        conn.rollback()
+        await conn.rollback()
         raise HTTPException(status_code=500, detail=str(e))
     finally:
-        conn.close()
+        await cur.close()
+        app.state.shipping_pool.release(conn)
 
 @app.delete("/shipments/{shipment_id}")
-def delete_shipment(shipment_id: int):
+async def delete_shipment(shipment_id: int):
     """Delete a shipment."""
-    conn = get_connection("shipping_db")
-    cur = conn.cursor()
+    conn = await app.state.shipping_pool.acquire()
+    cur = await conn.cursor()
     try:
-        cur.execute("DELETE FROM Shipments WHERE shipment_id = %s", (shipment_id,))
-        conn.commit()
+        await cur.execute("DELETE FROM Shipments WHERE shipment_id = %s", (shipment_id,))
+        await conn.commit()
 
         if cur.rowcount == 0:
             raise HTTPException(status_code=404, detail="Shipment not found")
 
         return {"message": f"🗑️ Shipment {shipment_id} deleted successfully"}
     except Exception as e:
-        conn.rollback()
+        await conn.rollback()
         raise HTTPException(status_code=500, detail=str(e))
     finally:
-        conn.close()
+        await cur.close()
+        app.state.shipping_pool.release(conn)
 
 if __name__ == "__main__":
-    uvicorn.run("main:app", host="127.0.0.1", port=8001, reload=True)
+    # Bind to 0.0.0.0 so the server is reachable from Docker containers / host mappings
+    uvicorn.run("main:app", host="0.0.0.0", port=8001, reload=True, loop="uvloop", http="httptools")
@@ -10,11 +10,53 @@ This script orchestrates the complete flow:
 4. Create shipment record
 """
 
-import requests
-import json
+import aiohttp
+import argparse
+import asyncio
+import itertools
+import logging
+import logging.handlers
+import orjson
+import os
+import random
+import socket
 import time
+from dataclasses import dataclass
 from datetime import datetime
-from typing import Dict, Any
+from typing import Dict, Any, ClassVar, Optional
+
+# Script-level output; per-workflow progress goes to the child logger so bulk runs can
+# silence it without hiding the summary. Handlers are configured in __main__.
+log = logging.getLogger("workflow")
+step_log = logging.getLogger("workflow.steps")
+
+# Session-wide default timeout; calls to a known service use SERVICE_TIMEOUTS instead
+REQUEST_TIMEOUT = aiohttp.ClientTimeout(total=5)
+# Per-service budgets sized to how long each call should normally take, so a hung
+# service fails fast instead of holding the workflow
+SERVICE_TIMEOUTS = {
+    "inventory": aiohttp.ClientTimeout(total=3.0),
+    "customer": aiohttp.ClientTimeout(total=2.0),
+    "shipment": aiohttp.ClientTimeout(total=2.0),
+    "notification": aiohttp.ClientTimeout(total=1.0),
+}
+# Default for --pace: set DEMO_SLOW to pause between steps (and on the simulated payment)
+# so a live demo can be followed; by default the workflow runs at full speed
+DEMO_PAUSE = 1.0 if os.getenv("DEMO_SLOW") else 0.0
+# Keep-alive connections kept per service host
+CONNECTIONS_PER_HOST = 16
+# Upper bound for one workflow end to end, including the pauses between steps
+WORKFLOW_TIMEOUT = 30.0
+# What a failed call can raise: connection/HTTP errors and the session timeout
+REQUEST_ERRORS = (aiohttp.ClientError, asyncio.TimeoutError)
+# Failures where the request never reached the service, so even a POST is safe to resend
+CONNECT_ERRORS = (aiohttp.ClientConnectorError,)
+# Gateway/overload statuses worth retrying; anything else fails the call straight away
+RETRY_STATUSES = frozenset({502, 503, 504})
+RETRY_ATTEMPTS = 3
+# Exponential backoff with full jitter: up to 0.1s, 0.2s, ... capped at RETRY_BACKOFF_MAX
+RETRY_BACKOFF = 0.1
+RETRY_BACKOFF_MAX = 2.0
 
 # Service URLs (verified working services)
 NOTIFICATION_SERVICE = "http://localhost:8080"
@@ -23,62 +65,228 @@ CATALOG_SERVICE = "http://localhost:3000"
 INVENTORY_SERVICE = "http://localhost:3002"
 CUSTOMER_SERVICE = "http://localhost:3001"
 
+# Endpoint URLs, built once instead of formatted on every call
+EMAIL_NOTIFICATION_URL = f"{NOTIFICATION_SERVICE}/v1/notifications/email"
+SHIPMENTS_URL = f"{SHIPMENT_SERVICE}/shipments"
+SHIPMENTS_PROBE_URL = f"{SHIPMENT_SERVICE}/shipments?limit=1"
+INVENTORY_LIST_URL = f"{INVENTORY_SERVICE}/api/getallinventory"
+CUSTOMER_HEALTH_URL = f"{CUSTOMER_SERVICE}/api/healthcheck"
+
+def pretty_json(data: Any) -> str:
+    """Indented JSON for log output, encoded by orjson (falls back to str() for unknown types)"""
+    return orjson.dumps(data, option=orjson.OPT_INDENT_2, default=str).decode()
+
+class RetryableStatus(Exception):
+    """A transient 5xx response; retry_after is the server's Retry-After in seconds, if any"""
+    def __init__(self, step_name: str, status: int, retry_after: Optional[float] = None):
+        super().__init__(f"{step_name} failed with status {status}")
+        self.status = status
+        self.retry_after = retry_after
+
+def raise_for_retry(response: aiohttp.ClientResponse, step_name: str):
+    """Raise RetryableStatus if the response is one of RETRY_STATUSES"""
+    if response.status not in RETRY_STATUSES:
+        return
+    try:
+        # Only the delta-seconds form; an HTTP-date falls back to the normal backoff
+        retry_after = float(response.headers.get("Retry-After", ""))
+    except ValueError:
+        retry_after = None
+    raise RetryableStatus(step_name, response.status, retry_after)
+
+def backoff_delay(attempt: int, retry_after: Optional[float] = None) -> float:
+    if retry_after is not None:
+        return min(retry_after, RETRY_BACKOFF_MAX)
+    return random.uniform(0, min(RETRY_BACKOFF * 2 ** attempt, RETRY_BACKOFF_MAX))
+
+async def with_retry(send, *args, attempts: int = RETRY_ATTEMPTS,
+                     retry_on: tuple = (*REQUEST_ERRORS, RetryableStatus)):
+    """Await send(*args), retrying the errors in retry_on (by default connection errors,
+    timeouts and RETRY_STATUSES, which suits GETs). POSTs that create something pass
+    retry_on=CONNECT_ERRORS: after a timeout or 5xx the service may already have acted on it"""
+    for attempt in range(attempts):
+        try:
+            return await send(*args)
+        except retry_on as e:
+            if attempt == attempts - 1:
+                raise
+            await asyncio.sleep(backoff_delay(attempt, getattr(e, "retry_after", None)))
+
+# Fields shown in the one-line success log; the full response is only logged at DEBUG
+SUMMARY_FIELDS = ("order_id", "payment_id", "shipment_id", "status", "tracking_no")
+
+# Request payloads. orjson serializes dataclasses directly, so they're passed as json= as-is
+@dataclass(slots=True)
+class Shipment:
+    shipment_id: int
+    order_id: int
+    carrier: str
+    status: str
+    tracking_no: str
+    shipped_at: Optional[str] = None
+    delivered_at: Optional[str] = None
+
+@dataclass(slots=True)
+class EmailNotification:
+    # Field names follow the notification service's JSON
+    orderId: int
+    paymentId: Optional[int]
+    shipmentId: Optional[int]
+    type: str
+    subject: str
+    message: str
+    messageContent: str
+    channel: str = "EMAIL"
+    customerEmail: str = "customer@example.com"
+
+# Notification texts by type: (subject, messageContent, message). The latter two are
+# filled in with str.format_map from one context dict per message
+NOTIFICATION_TEMPLATES = {
+    "PAYMENT": (
+        "Payment Confirmation - Order Successful",
+        "Payment of ${amount} processed successfully for Order #{order_id}",
+        "Dear Customer, your payment for Order #{order_id} has been processed successfully. Amount: ${amount}",
+    ),
+    "SHIPMENT": (
+        "Your Order is Being Prepared for Shipment",
+        "Your order #{order_id} is being prepared for shipment. Tracking: {tracking_no}",
+        "Great news! Your Order #{order_id} is being prepared for shipment with {carrier}. "
+        "Tracking Number: {tracking_no}",
+    ),
+}
+
 class ECommerceWorkflow:
-    def __init__(self):
-        self.workflow_id = int(time.time())
+    # Ids are sequential within a run; each run starts at a random point in INT range (with
+    # headroom for the run itself and the +1000 payment id), so separate runs are unlikely,
+    # though not guaranteed, to overlap. A clock seed reused ids whenever a run of N workflows
+    # was followed by another within N seconds
+    _workflow_ids = itertools.count(random.randrange(1, 2**31 - 10**7))
+    # Notification sends still in flight across all workflows; drained before the session closes
+    _background_tasks: set = set()
+    # One session (and so one connection pool) shared by every workflow in the process
+    _session: ClassVar[Optional[aiohttp.ClientSession]] = None
+
+    def __init__(self, session: Optional[aiohttp.ClientSession] = None, inventory_status: Optional[int] = None,
+                 pace: float = DEMO_PAUSE):
+        self.session = session or self.get_session()
+        # Seconds to pause between steps; 0 skips the pauses entirely
+        self.pace = pace
+        # Result of the inventory check done once in setup(); None if it was unreachable
+        self.inventory_status = inventory_status
+        self.workflow_id = next(self._workflow_ids)
+        # One timestamp per workflow, shared by the order and payment records
+        self.started_at = datetime.now().isoformat()
         
-    def log_step(self, step: str, data: Any = None):
-        """Log workflow steps"""
-        print(f"\n🔄 STEP: {step}")
-        if data:
-            print(f"   Data: {json.dumps(data, indent=2, default=str)}")
+    @property
+    def verbose(self) -> bool:
+        # Checked before building progress output so quiet runs skip the formatting too
+        return step_log.isEnabledFor(logging.INFO)
+
+    def emit(self, *lines: str):
+        """Log progress lines as a single record"""
+        if self.verbose:
+            step_log.info("\n".join(lines))
             
-    def handle_response(self, response: requests.Response, step_name: str) -> Dict:
-        """Handle API response and log results"""
-        if response.status_code in [200, 201]:
-            result = response.json()
-            print(f"✅ {step_name} SUCCESS: {response.status_code}")
-            print(f"   Response: {json.dumps(result, indent=2, default=str)}")
-            return result
+    def log_step(self, step: str, data: Any = None):
+        """Log workflow steps; the data is only serialized at DEBUG"""
+        if data and step_log.isEnabledFor(logging.DEBUG):
+            step_log.debug("\n🔄 STEP: %s\n   Data: %s", step, pretty_json(data))
+        else:
+            step_log.info("\n🔄 STEP: %s", step)
+
+    def log_success(self, step_name: str, status: int, result: Any = None):
+        """Log a successful step on one line with its key ids; the full response only at DEBUG"""
+        if result is not None and step_log.isEnabledFor(logging.DEBUG):
+            step_log.debug("✅ %s SUCCESS: %s\n   Response: %s", step_name, status, pretty_json(result))
+            return
+        summary = ""
+        if isinstance(result, dict) and self.verbose:
+            summary = " ".join(f"{key}={result[key]}" for key in SUMMARY_FIELDS if key in result)
+        if summary:
+            step_log.info("✅ %s SUCCESS: %s %s", step_name, status, summary)
         else:
-            print(f"❌ {step_name} FAILED: {response.status_code}")
-            print(f"   Error: {response.text}")
-            raise Exception(f"{step_name} failed with status {response.status_code}")
+            step_log.info("✅ %s SUCCESS: %s", step_name, status)
+            
+    async def handle_response(self, response: aiohttp.ClientResponse, step_name: str,
+                              parse_body: bool = True) -> Dict:
+        """Handle API response and log results; parse_body=False only checks the status"""
+        if response.status not in (200, 201):
+            # Logged before raising so the body is kept for 502/503/504 too, which raise RetryableStatus
+            step_log.error("❌ %s FAILED: %s\n   Error: %s", step_name, response.status, await response.text())
+            raise_for_retry(response, step_name)
+            raise Exception(f"{step_name} failed with status {response.status}")
+        if not parse_body:
+            # Drain the body unparsed so the connection goes back to the pool
+            await response.read()
+            self.log_success(step_name, response.status)
+            return {}
+        result = orjson.loads(await response.read())
+        self.log_success(step_name, response.status, result)
+        return result
+
+    @classmethod
+    def get_session(cls) -> aiohttp.ClientSession:
+        """Return the shared session, creating it on first use (must be called inside the event loop)"""
+        if cls._session is None or cls._session.closed:
+            cls._session = create_session()
+        return cls._session
+
+    @classmethod
+    async def close_session(cls):
+        if cls._session is not None:
+            await cls._session.close()
+            cls._session = None
+
+    def send_in_background(self, send, *args):
+        """Schedule a notification without blocking the workflow on its response"""
+        # Only resent if it never went out; a resent email after a timeout reaches the customer twice
+        task = asyncio.create_task(with_retry(send, *args, retry_on=CONNECT_ERRORS))
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
 
-    def step1_place_order(self) -> Dict:
+    @classmethod
+    async def wait_for_background_tasks(cls) -> int:
+        """Wait for queued notifications; returns how many failed"""
+        if not cls._background_tasks:
+            return 0
+        results = await asyncio.gather(*cls._background_tasks, return_exceptions=True)
+        return sum(1 for result in results if isinstance(result, Exception))
+
+    async def pause(self):
+        if self.pace:
+            await asyncio.sleep(self.pace)
+
+    async def step1_place_order(self) -> Dict:
         """Step 1: Simulate placing an order (using inventory check)"""
         self.log_step("1️⃣ SIMULATING ORDER PLACEMENT")
         
-        # Simulate order by checking inventory first
-        try:
-            inventory_response = requests.get("http://localhost:3002/api/getallinventory", timeout=5)
-            if inventory_response.status_code == 200:
-                print("✅ Inventory Check SUCCESS: Products available")
-            else:
-                print("⚠️ Inventory Check: Service available but no products configured")
-        except:
-            print("⚠️ Inventory Service not available, proceeding with simulated order")
+        # Simulate order using the inventory check made once in setup()
+        if self.inventory_status == 200:
+            self.emit("✅ Inventory Check SUCCESS: Products available")
+        elif self.inventory_status is not None:
+            self.emit("⚠️ Inventory Check: Service available but no products configured")
+        else:
+            self.emit("⚠️ Inventory Service not available, proceeding with simulated order")
         
         # Return simulated order data
         order_data = {
             "order_id": self.workflow_id,
             "customer_id": 1001,
-            "order_date": datetime.now().isoformat(),
+            "order_date": self.started_at,
             "status": "confirmed",
             "total_amount": 299.99,
             "shipping_address": "123 Main St, Tech City, TC 12345"
         }
         
-        print("✅ Order Placement SUCCESS: 200")
-        print(f"   Response: {json.dumps(order_data, indent=2, default=str)}")
+        self.log_success("Order Placement", 200, order_data)
         return order_data
 
-    def step2_process_payment(self, order_data: Dict) -> Dict:
+    async def step2_process_payment(self, order_data: Dict) -> Dict:
         """Step 2: Simulate payment processing"""
         self.log_step("2️⃣ SIMULATING PAYMENT PROCESSING")
         
         # Simulate payment processing delay
-        time.sleep(1)
+        await self.pause()
         
         payment_data = {
             "payment_id": self.workflow_id + 1000,
@@ -88,128 +296,139 @@ class ECommerceWorkflow:
             "status": "completed",
             "transaction_id": f"txn_{self.workflow_id}",
             "payment_gateway": "stripe",
-            "processed_at": datetime.now().isoformat()
+            "processed_at": self.started_at
         }
         
-        print("✅ Payment Processing SUCCESS: 200")
-        print(f"   Response: {json.dumps(payment_data, indent=2, default=str)}")
+        self.log_success("Payment Processing", 200, payment_data)
         return payment_data
 
-    def step3_send_notification(self, order_data: Dict, payment_data: Dict) -> Dict:
+    async def step3_send_notification(self, order_data: Dict, payment_data: Dict) -> Dict:
         """Step 3: Send notification about successful payment"""
         self.log_step("3️⃣ SENDING NOTIFICATION")
         
-        notification_data = {
-            "orderId": order_data.get("order_id", 1),
-            "paymentId": payment_data.get("payment_id", 1), 
-            "shipmentId": None,
-            "type": "PAYMENT",
-            "channel": "EMAIL",
-            "messageContent": f"Payment of ${order_data.get('total_amount', 299.99)} processed successfully for Order #{order_data.get('order_id', 1)}",
-            "customerEmail": "customer@example.com",
-            "subject": "Payment Confirmation - Order Successful",
-            "message": f"Dear Customer, your payment for Order #{order_data.get('order_id', 1)} has been processed successfully. Amount: ${order_data.get('total_amount', 299.99)}"
+        context = {
+            "order_id": order_data.get("order_id", 1),
+            "amount": order_data.get("total_amount", 299.99),
         }
-        
-        response = requests.post(f"{NOTIFICATION_SERVICE}/v1/notifications/email", json=notification_data)
-        return self.handle_response(response, "Notification Sending")
+        return await self.send_notification("PAYMENT", "Notification Sending", context,
+                                            payment_id=payment_data.get("payment_id", 1))
 
-    def step4_create_shipment(self, order_data: Dict, payment_data: Dict) -> Dict:
-        """Step 4: Create shipment record"""
+    async def step4_create_shipment(self, order_data: Dict, payment_data: Dict) -> Shipment:
+        """Step 4: Create shipment record; returns the shipment that was created"""
         self.log_step("4️⃣ CREATING SHIPMENT")
         
-        shipment_data = {
-            "shipment_id": int(f"{self.workflow_id}"),
-            "order_id": order_data.get("order_id", 1),
-            "carrier": "FastShip Express",
-            "status": "preparing",
-            "tracking_no": f"FS{self.workflow_id}",
-            "shipped_at": None,
-            "delivered_at": None
-        }
+        shipment = Shipment(
+            shipment_id=self.workflow_id,
+            order_id=order_data.get("order_id", 1),
+            carrier="FastShip Express",
+            status="preparing",
+            tracking_no=f"FS{self.workflow_id}"
+        )
         
-        response = requests.post(f"{SHIPMENT_SERVICE}/shipments", json=shipment_data)
-        return self.handle_response(response, "Shipment Creation")
+        async with self.session.post(SHIPMENTS_URL, json=shipment,
+                                     timeout=SERVICE_TIMEOUTS["shipment"]) as response:
+            await self.handle_response(response, "Shipment Creation")
+        return shipment
 
-    def step5_send_shipment_notification(self, order_data: Dict, shipment_data: Dict) -> Dict:
+    async def step5_send_shipment_notification(self, order_data: Dict, shipment: Shipment) -> Dict:
         """Step 5: Send shipping notification"""
         self.log_step("5️⃣ SENDING SHIPPING NOTIFICATION")
         
-        shipping_notification = {
-            "orderId": order_data.get("order_id", 1),
-            "paymentId": None,
-            "shipmentId": shipment_data.get("shipment_id", 1),
-            "type": "SHIPMENT", 
-            "channel": "EMAIL",
-            "messageContent": f"Your order #{order_data.get('order_id', 1)} is being prepared for shipment. Tracking: {shipment_data.get('tracking_no', 'N/A')}",
-            "customerEmail": "customer@example.com", 
-            "subject": "Your Order is Being Prepared for Shipment",
-            "message": f"Great news! Your Order #{order_data.get('order_id', 1)} is being prepared for shipment with {shipment_data.get('carrier', 'our carrier')}. Tracking Number: {shipment_data.get('tracking_no', 'N/A')}"
+        context = {
+            "order_id": order_data.get("order_id", 1),
+            "tracking_no": shipment.tracking_no,
+            "carrier": shipment.carrier,
         }
+        return await self.send_notification("SHIPMENT", "Shipping Notification", context,
+                                            shipment_id=shipment.shipment_id)
+
+    async def send_notification(self, kind: str, step_name: str, context: Dict,
+                                payment_id: Optional[int] = None, shipment_id: Optional[int] = None) -> Dict:
+        """Build a `kind` notification from NOTIFICATION_TEMPLATES and post it"""
+        subject, content_template, message_template = NOTIFICATION_TEMPLATES[kind]
+        notification = EmailNotification(
+            orderId=context["order_id"],
+            paymentId=payment_id,
+            shipmentId=shipment_id,
+            type=kind,
+            subject=subject,
+            messageContent=content_template.format_map(context),
+            message=message_template.format_map(context)
+        )
         
-        response = requests.post(f"{NOTIFICATION_SERVICE}/v1/notifications/email", json=shipping_notification)
-        return self.handle_response(response, "Shipping Notification")
+        async with self.session.post(EMAIL_NOTIFICATION_URL, json=notification,
+                                     timeout=SERVICE_TIMEOUTS["notification"]) as response:
+            return await self.handle_response(response, step_name, parse_body=False)
 
-    def run_complete_workflow(self):
+    async def run_steps(self):
+        """Run steps 1-5; returns the order, payment and shipment results"""
+        # Step 1: Place Order
+        order_result = await self.step1_place_order()
+        await self.pause()  # Brief pause between steps
+        
+        # Step 2: Process Payment  
+        payment_result = await self.step2_process_payment(order_result)
+        await self.pause()
+        
+        # Step 3: Send Payment Notification. Notifications are informational, so they
+        # are sent in the background while the shipment is created
+        self.send_in_background(self.step3_send_notification, order_result, payment_result)
+        
+        # Step 4: Create Shipment. Only resent if it never went out: a retried insert that
+        # had already landed would fail on the duplicate shipment_id
+        shipment_result = await with_retry(self.step4_create_shipment, order_result, payment_result,
+                                           retry_on=CONNECT_ERRORS)
+        await self.pause()
+        
+        # Step 5: Send Shipment Notification
+        self.send_in_background(self.step5_send_shipment_notification, order_result, shipment_result)
+        return order_result, payment_result, shipment_result
+
+    async def run_complete_workflow(self):
         """Execute the complete interservice workflow"""
-        print("🚀 STARTING E-COMMERCE INTERSERVICE WORKFLOW")
-        print(f"   Workflow ID: {self.workflow_id}")
-        print("="*60)
+        self.emit("🚀 STARTING E-COMMERCE INTERSERVICE WORKFLOW",
+                  f"   Workflow ID: {self.workflow_id}",
+                  "="*60)
         
         try:
-            # Step 1: Place Order
-            order_result = self.step1_place_order()
-            time.sleep(1)  # Brief pause between steps
-            
-            # Step 2: Process Payment  
-            payment_result = self.step2_process_payment(order_result)
-            time.sleep(1)
+            order_result, payment_result, shipment_result = await asyncio.wait_for(
+                self.run_steps(), WORKFLOW_TIMEOUT)
             
-            # Step 3: Send Payment Notification
-            notification_result = self.step3_send_notification(order_result, payment_result)
-            time.sleep(1)
-            
-            # Step 4: Create Shipment
-            shipment_result = self.step4_create_shipment(order_result, payment_result)
-            time.sleep(1)
-            
-            # Step 5: Send Shipment Notification
-            final_notification = self.step5_send_shipment_notification(order_result, shipment_result)
-            
-            print("\n" + "="*60)
-            print("🎉 WORKFLOW COMPLETED SUCCESSFULLY!")
-            print("\n📊 SUMMARY:")
-            print(f"   • Order ID: {order_result.get('order_id', 'N/A')}")
-            print(f"   • Payment ID: {payment_result.get('payment_id', 'N/A')}")
-            print(f"   • Payment Amount: ${payment_result.get('amount', 'N/A')}")
-            print(f"   • Notifications Sent: 2")
-            print(f"   • Shipment Created: ✅ YES")
-            print(f"   • Tracking Number: FS{self.workflow_id}")
-            print(f"   • Carrier: FastShip Express")
-            
-            print(f"\n🔗 INTERSERVICE CALLS MADE:")
-            print(f"   • Inventory Service: 1 GET request (product check)")
-            print(f"   • Notification Service: 2 POST requests")
-            print(f"   • Shipment Service: 1 POST request")
-            print(f"   • Total API calls: 4")
+            if self.verbose:
+                self.emit(
+                    "\n" + "="*60,
+                    "🎉 WORKFLOW COMPLETED SUCCESSFULLY!",
+                    "\n📊 SUMMARY:",
+                    f"   • Order ID: {order_result.get('order_id', 'N/A')}",
+                    f"   • Payment ID: {payment_result.get('payment_id', 'N/A')}",
+                    f"   • Payment Amount: ${payment_result.get('amount', 'N/A')}",
+                    "   • Notifications Queued: 2",
+                    "   • Shipment Created: ✅ YES",
+                    f"   • Tracking Number: {shipment_result.tracking_no}",
+                    f"   • Carrier: {shipment_result.carrier}",
+                    "\n🔗 INTERSERVICE CALLS MADE:",
+                    "   • Inventory Service: 1 GET request (product check, shared by the run)",
+                    "   • Notification Service: 2 POST requests",
+                    "   • Shipment Service: 1 POST request",
+                    "   • Total API calls: 4"
+                )
             
+        except asyncio.TimeoutError:
+            # Either a per-service timeout or the overall workflow budget ran out
+            step_log.error("\n💥 WORKFLOW FAILED: timed out (service timeout or %.0fs workflow budget)", WORKFLOW_TIMEOUT)
+            raise
         except Exception as e:
-            print(f"\n💥 WORKFLOW FAILED: {str(e)}")
+            step_log.error("\n💥 WORKFLOW FAILED: %s", e)
             raise
 
-def test_individual_services():
-    """Test each service individually to ensure they're running"""
-    print("🔍 TESTING INDIVIDUAL SERVICES...")
-    
-    # Test Shipment Service
+async def check_shipment_service(session: aiohttp.ClientSession) -> str:
     try:
-        response = requests.get(f"{SHIPMENT_SERVICE}/shipments?limit=1", timeout=5)
-        shipment_status = "✅ RUNNING" if response.status_code == 200 else f"⚠️ ISSUES ({response.status_code})"
-        print(f"   Shipment Service: {shipment_status}")
-    except Exception as e:
-        print(f"   Shipment Service: ❌ NOT ACCESSIBLE ({str(e)})")
-    
-    # Test Notification Service
+        async with session.get(SHIPMENTS_PROBE_URL, timeout=SERVICE_TIMEOUTS["shipment"]) as response:
+            return "✅ RUNNING" if response.status == 200 else f"⚠️ ISSUES ({response.status})"
+    except REQUEST_ERRORS as e:
+        return f"❌ NOT ACCESSIBLE ({str(e)})"
+
+async def check_notification_service(session: aiohttp.ClientSession) -> str:
     try:
         # Test with actual notification endpoint since health endpoint doesn't exist
         test_notification = {
@@ -221,42 +440,167 @@ def test_individual_services():
             "channel": "EMAIL",
             "messageContent": "Service availability test"
         }
-        response = requests.post(f"{NOTIFICATION_SERVICE}/v1/notifications/email", json=test_notification, timeout=5)
-        notification_status = "✅ RUNNING" if response.status_code in [200, 201] else f"⚠️ ISSUES ({response.status_code})"
-        print(f"   Notification Service: {notification_status}")
-    except Exception as e:
-        print(f"   Notification Service: ❌ NOT ACCESSIBLE ({str(e)})")
+        async with session.post(EMAIL_NOTIFICATION_URL, json=test_notification,
+                                timeout=SERVICE_TIMEOUTS["notification"]) as response:
+            return "✅ RUNNING" if response.status in [200, 201] else f"⚠️ ISSUES ({response.status})"
+    except REQUEST_ERRORS as e:
+        return f"❌ NOT ACCESSIBLE ({str(e)})"
+
+async def check_customer_service(session: aiohttp.ClientSession) -> str:
+    try:
+        async with session.get(CUSTOMER_HEALTH_URL, timeout=SERVICE_TIMEOUTS["customer"]) as response:
+            if response.status == 404:
+                return "✅ RUNNING (service active, no health endpoint)"
+            return f"✅ RUNNING ({response.status})"
+    except REQUEST_ERRORS as e:
+        return f"❌ NOT ACCESSIBLE ({str(e)})"
+
+async def check_inventory_service(session: aiohttp.ClientSession) -> str:
+    try:
+        async with session.get(INVENTORY_LIST_URL, timeout=SERVICE_TIMEOUTS["inventory"]) as response:
+            return "✅ RUNNING" if response.status in [200, 400] else f"⚠️ ISSUES ({response.status})"
+    except REQUEST_ERRORS as e:
+        return f"❌ NOT ACCESSIBLE ({str(e)})"
+
+async def test_individual_services(session: aiohttp.ClientSession):
+    """Test each service individually to ensure they're running"""
+    log.info("🔍 TESTING INDIVIDUAL SERVICES...")
+    
+    # Probes are independent, so they run concurrently and report in a fixed order
+    checks = {
+        "Shipment Service": check_shipment_service(session),
+        "Notification Service": check_notification_service(session),
+        "Customer Service": check_customer_service(session),
+        "Inventory Service": check_inventory_service(session),
+    }
+    statuses = await asyncio.gather(*checks.values())
+    log.info("\n".join(f"   {service}: {status}" for service, status in zip(checks, statuses)))
+
+async def fetch_inventory_status(session: aiohttp.ClientSession) -> Optional[int]:
+    """HTTP status of the inventory listing, or None if the service can't be reached"""
+    async def get() -> int:
+        async with session.get(INVENTORY_LIST_URL, timeout=SERVICE_TIMEOUTS["inventory"]) as response:
+            raise_for_retry(response, "Inventory Check")
+            return response.status
     
-    # Test Customer Service
     try:
-        response = requests.get("http://localhost:3001/api/healthcheck", timeout=5)
-        if response.status_code == 404:
-            customer_status = "✅ RUNNING (service active, no health endpoint)"
-        else:
-            customer_status = f"✅ RUNNING ({response.status_code})"
-        print(f"   Customer Service: {customer_status}")
-    except Exception as e:
-        print(f"   Customer Service: ❌ NOT ACCESSIBLE ({str(e)})")
+        return await with_retry(get)
+    except RetryableStatus as e:
+        return e.status
+    except REQUEST_ERRORS:
+        return None
+
+async def setup(session: aiohttp.ClientSession) -> Optional[int]:
+    """One-off checks shared by every workflow in the run; returns the inventory status"""
+    _, inventory_status = await asyncio.gather(
+        test_individual_services(session),
+        fetch_inventory_status(session)
+    )
+    return inventory_status
+
+async def prewarm_connections(session: aiohttp.ClientSession, connections: int):
+    """Open `connections` keep-alive connections to each service every order calls
+    (shipment, notification), so the first concurrent workflows don't all pay for a connect"""
+    async def touch(url: str):
+        try:
+            async with session.head(url, timeout=REQUEST_TIMEOUT) as response:
+                await response.read()
+        except REQUEST_ERRORS:
+            pass  # Unreachable services are already reported by setup()
+    
+    # Concurrent requests to the same host each take their own connection
+    await asyncio.gather(*(touch(url) for url in (SHIPMENT_SERVICE, NOTIFICATION_SERVICE)
+                           for _ in range(connections)))
+
+async def run_many(session: aiohttp.ClientSession, orders: int, concurrency: int = 16,
+                   inventory_status: Optional[int] = None, pace: float = DEMO_PAUSE) -> int:
+    """Run `orders` workflows with at most `concurrency` in flight; returns how many succeeded"""
+    semaphore = asyncio.Semaphore(concurrency)
     
-    # Test Inventory Service  
+    async def run_one():
+        async with semaphore:
+            await ECommerceWorkflow(session, inventory_status, pace).run_complete_workflow()
+    
+    results = await asyncio.gather(*(run_one() for _ in range(orders)), return_exceptions=True)
+    return sum(1 for result in results if not isinstance(result, Exception))
+
+def orjson_dumps(obj: Any) -> str:
+    # aiohttp expects json_serialize to return str
+    return orjson.dumps(obj).decode()
+
+def create_session() -> aiohttp.ClientSession:
+    """One session for the whole run: its connector keeps connections to each service alive"""
+    connector = aiohttp.TCPConnector(
+        limit=64,
+        limit_per_host=CONNECTIONS_PER_HOST,
+        keepalive_timeout=60,
+        # Resolve each host once per run; IPv4 only so localhost isn't tried on ::1 first
+        use_dns_cache=True,
+        ttl_dns_cache=300,
+        family=socket.AF_INET
+    )
+    # Request bodies passed as json= are encoded with orjson instead of the stdlib json module
+    return aiohttp.ClientSession(connector=connector, timeout=REQUEST_TIMEOUT, json_serialize=orjson_dumps)
+
+async def main(args: argparse.Namespace):
+    session = ECommerceWorkflow.get_session()
     try:
-        response = requests.get("http://localhost:3002/api/getallinventory", timeout=5)
-        inventory_status = "✅ RUNNING" if response.status_code in [200, 400] else f"⚠️ ISSUES ({response.status_code})"
-        print(f"   Inventory Service: {inventory_status}")
-    except Exception as e:
-        print(f"   Inventory Service: ❌ NOT ACCESSIBLE ({str(e)})")
+        # Test services first; this runs once however many workflows follow
+        inventory_status = await setup(session)
+        log.info("\n\n🚀 Starting automated interservice workflow...\n"
+                 "   This will demonstrate the complete e-commerce flow!\n")
+        
+        if args.orders == 1:
+            workflow = ECommerceWorkflow(session, inventory_status, args.pace)
+            await workflow.run_complete_workflow()
+        else:
+            # setup() leaves one warm connection per service; a concurrent run needs more
+            await prewarm_connections(session, min(args.concurrency, CONNECTIONS_PER_HOST))
+            started = time.perf_counter()
+            succeeded = await run_many(session, args.orders, args.concurrency, inventory_status, args.pace)
+            elapsed = time.perf_counter() - started
+            log.info("\n📈 %d/%d workflows succeeded in %.2fs (%.1f workflows/s, concurrency %d)",
+                     succeeded, args.orders, elapsed, args.orders / elapsed, args.concurrency)
+    finally:
+        # Let queued notifications finish while the session is still open
+        failed = await ECommerceWorkflow.wait_for_background_tasks()
+        if failed:
+            log.warning("⚠️ %d notification(s) could not be delivered", failed)
+        await ECommerceWorkflow.close_session()
+
+def positive_int(value: str) -> int:
+    """argparse type for counts that must be at least 1 (a zero-slot semaphore never releases)."""
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be a positive integer, got {value}")
+    return number
 
 if __name__ == "__main__":
-    print("🏪 E-COMMERCE MICROSERVICES INTERSERVICE COMMUNICATION DEMO")
-    print("="*70)
+    parser = argparse.ArgumentParser(description="Run the e-commerce interservice workflow")
+    parser.add_argument("--orders", type=positive_int, default=1, help="Number of workflows to run (default: 1)")
+    parser.add_argument("--concurrency", type=positive_int, default=16, help="Workflows in flight at once (default: 16)")
+    parser.add_argument("--pace", type=float, default=DEMO_PAUSE,
+                        help="Seconds to pause between steps for a live demo (default: 0, or 1 with DEMO_SLOW set)")
+    parser.add_argument("--verbose", action="store_true",
+                        help="Print step-by-step output for every workflow when --orders > 1")
+    args = parser.parse_args()
     
-    # Test services first
-    test_individual_services()
-    print()
+    handler = logging.StreamHandler()
+    if args.orders > 1:
+        # Bulk runs batch their output; warnings and errors still flush straight away
+        handler = logging.handlers.MemoryHandler(capacity=1024, flushLevel=logging.WARNING, target=handler)
+        if not args.verbose:
+            # ...and only report failures per workflow
+            step_log.setLevel(logging.WARNING)
+    # LOG_LEVEL=DEBUG adds the request/response payloads; WARNING leaves only failures
+    logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO").upper(), format="%(message)s", handlers=[handler])
     
-    print("\n🚀 Starting automated interservice workflow...")
-    print("   This will demonstrate the complete e-commerce flow!")
-    print()
+    log.info("🏪 E-COMMERCE MICROSERVICES INTERSERVICE COMMUNICATION DEMO\n%s", "="*70)
+    
+    try:
+        import uvloop
+        uvloop.install()
+    except ImportError:
+        pass  # stdlib event loop
     
-    workflow = ECommerceWorkflow()
-    workflow.run_complete_workflow()
\ No newline at end of file
+    asyncio.run(main(args))